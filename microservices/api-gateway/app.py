@@ -3,13 +3,20 @@
 # Routes requests to PDF Service (8001), User Service (8002), AI Service (8003), etc.
 
 import os
+import random
+import socket
 import logging
 import json
 from datetime import datetime
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -24,35 +31,85 @@ CORS(app,
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Services run on the same host, so a connect that takes longer than this means the service is down
+CONNECT_TIMEOUT = 2  # seconds
+
 # Health check cache - cache health status for 10 seconds
-from time import time
+from time import monotonic
 health_cache = {}
 HEALTH_CACHE_TTL = 10  # seconds
 
 # Service Registry - Define all microservices
 SERVICES = {
     'user-service': {
-        'url': 'http://localhost:8002',
+        'url': 'http://127.0.0.1:8002',
         'health': '/api/v1/health',
         'routes': ['/api/v1/auth', '/api/auth', '/api/users', '/api/v1/users']
     },
     'lesson-service': {
-        'url': 'http://localhost:8003',
+        'url': 'http://127.0.0.1:8003',
         'health': '/health/',
         'routes': ['/api/generate-lesson', '/api/lessons', '/upload_pdf', '/api/upload']
     },
     'teaching-service': {
-        'url': 'http://localhost:8004',
+        'url': 'http://127.0.0.1:8004',
         'health': '/health',
         'routes': ['/api/conversations', '/api/teaching', '/ws/teaching']  # Added conversations
     },
     'quiz-notes-service': {
-        'url': 'http://localhost:8005',
+        'url': 'http://127.0.0.1:8005',
         'health': '/health',
         'routes': ['/api/quiz', '/api/notes']
     }
 }
 
+class NoDelayAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets have Nagle disabled and TCP keepalive enabled."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        # urllib3's defaults already include TCP_NODELAY; add SO_KEEPALIVE so idle
+        # pooled connections (e.g. during long lesson generations) are kept alive
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ]
+        return super().init_poolmanager(*args, **kwargs)
+
+class JitteredRetry(Retry):
+    """Retry with random jitter on the exponential backoff so callers don't retry in lockstep."""
+    
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, backoff) if backoff else 0
+
+# Absorb transient failures from services that are still starting up. Connection
+# errors are retried for every method (nothing reached the service); 5xx responses
+# only for idempotent methods so a lesson generation POST is never sent twice.
+# Read timeouts are not retried - a service that is slow to answer would
+# otherwise hold the client for every attempt's full read timeout. read=False
+# re-raises the original ReadTimeoutError (read=0 would wrap it in a
+# MaxRetryError, which requests reports as a ConnectionError, not a Timeout).
+retry_policy = JitteredRetry(
+    total=3,
+    read=False,
+    backoff_factor=0.5,
+    status_forcelist=(502, 503, 504),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+
+# Shared HTTP session - keeps connections to the services alive between requests
+http_session = requests.Session()
+http_session.mount('http://', NoDelayAdapter(
+    pool_connections=len(SERVICES), pool_maxsize=8, max_retries=retry_policy
+))
+
+# Health probes must report a down service straight away, so they don't retry
+health_session = requests.Session()
+health_session.mount('http://', NoDelayAdapter(pool_connections=len(SERVICES), pool_maxsize=2))
+
+# Worker threads for probing all services at once
+health_executor = ThreadPoolExecutor(max_workers=len(SERVICES), thread_name_prefix='health-check')
+
 # Add specific route handler for conversations
 @app.route('/api/conversations/', methods=['GET', 'POST'])
 @app.route('/api/conversations/<path:subpath>', methods=['GET', 'POST', 'DELETE'])
@@ -70,18 +127,23 @@ def proxy_conversations(subpath=''):
     try:
         if request.method == 'GET':
             params = dict(request.args)
-            response = requests.get(target_url, params=params, timeout=30)
+            response = http_session.get(target_url, params=params, timeout=(CONNECT_TIMEOUT, 30))
         elif request.method == 'DELETE':
-            response = requests.delete(target_url, timeout=30)
+            response = http_session.delete(target_url, timeout=(CONNECT_TIMEOUT, 30))
         elif request.method == 'POST':
             if subpath:
-                response = requests.post(target_url, json=request.json, timeout=30)
+                response = http_session.post(target_url, json=request.json, timeout=(CONNECT_TIMEOUT, 30))
             else:
                 # POST to create conversation - route to create endpoint
                 create_url = f"{teaching_service['url']}/api/conversations/create/"
-                response = requests.post(create_url, json=request.json, timeout=30)
+                response = http_session.post(create_url, json=request.json, timeout=(CONNECT_TIMEOUT, 30))
             
-        return jsonify(response.json()), response.status_code
+        # Pass the teaching service's JSON through as-is rather than decoding and re-encoding it
+        return Response(
+            response.content,
+            status=response.status_code,
+            content_type=response.headers.get('Content-Type', 'application/json')
+        )
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Error proxying to teaching service: {e}")
@@ -101,19 +163,19 @@ def check_service_health(service_name, service_config, use_cache=True):
     # Check cache first
     if use_cache and service_name in health_cache:
         cached_result, cached_time = health_cache[service_name]
-        if time() - cached_time < HEALTH_CACHE_TTL:
+        if monotonic() - cached_time < HEALTH_CACHE_TTL:
             logger.debug(f" Using cached health status for {service_name}: {cached_result}")
             return cached_result
     
     try:
         health_url = f"{service_config['url']}{service_config['health']}"
         logger.debug(f" Health check for {service_name}: {health_url}")
-        response = requests.get(health_url, timeout=5)
+        response = health_session.get(health_url, timeout=(CONNECT_TIMEOUT, 5))
         is_healthy = response.status_code == 200
         
         # Cache the result
         if use_cache:
-            health_cache[service_name] = (is_healthy, time())
+            health_cache[service_name] = (is_healthy, monotonic())
         
         logger.debug(f" {service_name} health: {is_healthy} (status: {response.status_code})")
         return is_healthy
@@ -121,14 +183,21 @@ def check_service_health(service_name, service_config, use_cache=True):
         logger.error(f" Health check failed for {service_name}: {e}")
         # Cache failure as well to avoid repeated failed requests
         if use_cache:
-            health_cache[service_name] = (False, time())
+            health_cache[service_name] = (False, monotonic())
         return False
 
+def check_all_services_health():
+    """Check the health of all services concurrently."""
+    results = health_executor.map(
+        lambda item: check_service_health(*item), SERVICES.items()
+    )
+    return dict(zip(SERVICES.keys(), results))
+
 def proxy_request(target_url, method, headers=None, data=None, files=None):
     """Proxy request to target service."""
     try:
-        # Use longer timeout for file upload operations
-        timeout = 180 if (files or 'generate-lesson' in target_url or 'upload' in target_url) else 30
+        # Use longer read timeout for file upload operations
+        timeout = (CONNECT_TIMEOUT, 180 if (files or 'generate-lesson' in target_url or 'upload' in target_url) else 30)
         
         # Prepare headers
         proxy_headers = {}
@@ -141,17 +210,20 @@ def proxy_request(target_url, method, headers=None, data=None, files=None):
         
         # Make request to target service
         if method == 'GET':
-            response = requests.get(target_url, headers=proxy_headers, params=request.args, timeout=timeout)
+            response = http_session.get(target_url, headers=proxy_headers, params=request.args, timeout=timeout)
         elif method == 'POST':
             if files:
-                response = requests.post(target_url, headers={k: v for k, v in proxy_headers.items() if k.lower() != 'content-type'}, 
-                                       data=data, files=files, timeout=timeout)
+                # Stream the multipart body from the uploaded files instead of building it in memory
+                body = MultipartEncoder(fields={**(data or {}), **files})
+                upload_headers = {k: v for k, v in proxy_headers.items() if k.lower() != 'content-type'}
+                upload_headers['Content-Type'] = body.content_type
+                response = http_session.post(target_url, headers=upload_headers, data=body, timeout=timeout)
             else:
-                response = requests.post(target_url, headers=proxy_headers, json=data, timeout=timeout)
+                response = http_session.post(target_url, headers=proxy_headers, json=data, timeout=timeout)
         elif method == 'PUT':
-            response = requests.put(target_url, headers=proxy_headers, json=data, timeout=timeout)
+            response = http_session.put(target_url, headers=proxy_headers, json=data, timeout=timeout)
         elif method == 'DELETE':
-            response = requests.delete(target_url, headers=proxy_headers, timeout=timeout)
+            response = http_session.delete(target_url, headers=proxy_headers, timeout=timeout)
         else:
             return jsonify({'error': 'Method not supported'}), 405
         
@@ -176,11 +248,12 @@ def proxy_request(target_url, method, headers=None, data=None, files=None):
 def gateway_health():
     """API Gateway health check and service status."""
     service_status = {}
+    health = check_all_services_health()
     
     for service_name, service_config in SERVICES.items():
         service_status[service_name] = {
             'url': service_config['url'],
-            'healthy': check_service_health(service_name, service_config)
+            'healthy': health[service_name]
         }
     
     overall_health = any(status['healthy'] for status in service_status.values())
@@ -359,12 +432,13 @@ def generic_proxy(path):
 def list_services():
     """List all available services and their status."""
     service_info = {}
+    health = check_all_services_health()
     
     for service_name, service_config in SERVICES.items():
         service_info[service_name] = {
             'url': service_config['url'],
             'routes': service_config['routes'],
-            'healthy': check_service_health(service_name, service_config)
+            'healthy': health[service_name]
         }
     
     return jsonify({
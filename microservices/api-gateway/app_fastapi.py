@@ -5,8 +5,10 @@ Routes requests to User Service (8002), Lesson Service (8003), Teaching Service
 """
 
 import os
+import asyncio
 import logging
 from datetime import datetime
+from time import monotonic
 from typing import Optional, Dict, Any
 import httpx
 from fastapi import FastAPI, Request, Response, HTTPException, UploadFile, File, Form
@@ -36,32 +38,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Health check cache
+health_cache = {}
+HEALTH_CACHE_TTL = 10  # seconds
+
 # Service Registry - Define all microservices
 SERVICES = {
     'user-service': {
-        'url': 'http://localhost:8002',
+        'url': 'http://127.0.0.1:8002',
         'health': '/api/v1/health/',  # Fixed: Added trailing slash to match Django endpoint
         'routes': ['/api/v1/auth', '/api/auth', '/api/users', '/api/v1/users']
     },
     'lesson-service': {
-        'url': 'http://localhost:8003',
+        'url': 'http://127.0.0.1:8003',
         'health': '/health/',  # Fixed: Added trailing slash to match Django endpoint
         'routes': ['/api/generate-lesson', '/api/lessons', '/upload_pdf', '/api/upload']
     },
     'teaching-service': {
-        'url': 'http://localhost:8004',
+        'url': 'http://127.0.0.1:8004',
         'health': '/health',
         'routes': ['/api/conversations', '/api/teaching', '/ws/teaching']
     },
     'quiz-notes-service': {
-        'url': 'http://localhost:8005',
+        'url': 'http://127.0.0.1:8005',
         'health': '/health',
         'routes': ['/api/quiz', '/api/notes']
     }
 }
 
-# Create HTTP client with longer timeout for file operations
-http_client = httpx.AsyncClient(timeout=180.0)
+# Services run on the same host, so a connect that takes longer than this means the service is down
+CONNECT_TIMEOUT = 2.0
+
+# Create HTTP client with longer read timeout for file operations. Keep enough idle
+# connections per service that concurrent requests don't reopen sockets.
+http_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(180.0, connect=CONNECT_TIMEOUT),
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=8 * len(SERVICES), keepalive_expiry=60.0)
+)
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -75,15 +88,49 @@ def get_service_for_route(path: str):
                 return service_name, service_config
     return None, None
 
-async def check_service_health(service_name: str, service_config: Dict) -> bool:
-    """Check if a service is healthy."""
+async def check_service_health(service_name: str, service_config: Dict, use_cache: bool = True) -> bool:
+    """Check if a service is healthy with caching."""
+    if use_cache and service_name in health_cache:
+        cached_result, cached_time = health_cache[service_name]
+        if monotonic() - cached_time < HEALTH_CACHE_TTL:
+            return cached_result
+
     try:
         health_url = f"{service_config['url']}{service_config['health']}"
-        response = await http_client.get(health_url, timeout=5.0)
-        return response.status_code == 200
+        response = await http_client.get(health_url, timeout=httpx.Timeout(5.0, connect=CONNECT_TIMEOUT))
+        is_healthy = response.status_code == 200
     except Exception as e:
         logger.error(f"Health check failed for {service_name}: {e}")
-        return False
+        # Cache failure as well to avoid repeated failed requests
+        is_healthy = False
+
+    if use_cache:
+        health_cache[service_name] = (is_healthy, monotonic())
+    return is_healthy
+
+async def recheck_service_health(target_url: str):
+    """Re-probe the service owning target_url after a failed connect.
+    
+    A single refused connection (e.g. during a restart) isn't enough to mark the
+    service down - only a failed health probe is cached as unhealthy.
+    """
+    for service_name, service_config in SERVICES.items():
+        if target_url.startswith(service_config['url']):
+            is_healthy = await check_service_health(service_name, service_config, use_cache=False)
+            health_cache[service_name] = (is_healthy, monotonic())
+            return
+
+async def check_all_services_health(use_cache: bool = True) -> Dict[str, bool]:
+    """Check the health of all services concurrently."""
+    results = await asyncio.gather(
+        *(check_service_health(service_name, service_config, use_cache) for service_name, service_config in SERVICES.items())
+    )
+    return dict(zip(SERVICES.keys(), results))
+
+def filter_proxy_headers(headers: Dict = None) -> Dict:
+    """Copy the client's headers for forwarding, minus the ones httpx sets itself."""
+    excluded_headers = {'host', 'content-length', 'content-type'}
+    return {key: value for key, value in (headers or {}).items() if key.lower() not in excluded_headers}
 
 async def proxy_request(
     target_url: str,
@@ -92,21 +139,29 @@ async def proxy_request(
     json_data: Any = None,
     form_data: Dict = None,
     files: Dict = None,
-    params: Dict = None
+    params: Dict = None,
+    content: bytes = None
 ) -> Response:
-    """Proxy request to target service."""
+    """Proxy request to target service.
+    
+    A raw body passed as content is forwarded as-is with the caller's content type
+    instead of being re-encoded from json_data.
+    """
     try:
-        # Prepare headers - exclude host and content-length
-        proxy_headers = {}
-        if headers:
-            excluded_headers = {'host', 'content-length', 'content-type'}
-            for key, value in headers.items():
-                if key.lower() not in excluded_headers:
-                    proxy_headers[key] = value
+        proxy_headers = filter_proxy_headers(headers)
+        content_type = 'application/json'
+        for key, value in (headers or {}).items():
+            if key.lower() == 'content-type':
+                content_type = value
         
         # Make request based on method
         if method == 'GET':
             response = await http_client.get(target_url, headers=proxy_headers, params=params)
+        elif method in ('POST', 'PUT') and content:
+            # Raw body - pass through without decoding and re-encoding it
+            response = await http_client.request(
+                method, target_url, headers={**proxy_headers, 'content-type': content_type}, content=content
+            )
         elif method == 'POST':
             if files:
                 # Multipart form data with files
@@ -137,6 +192,8 @@ async def proxy_request(
         raise HTTPException(status_code=504, detail="Service timeout")
     except httpx.ConnectError:
         logger.error(f"Connection error to {target_url}")
+        # If the service really is down, fail later requests fast until the health cache entry expires
+        await recheck_service_health(target_url)
         raise HTTPException(status_code=503, detail="Service unavailable")
     except Exception as e:
         logger.error(f"Error proxying request to {target_url}: {e}")
@@ -167,11 +224,12 @@ async def log_requests(request: Request, call_next):
 async def gateway_health():
     """API Gateway health check and service status."""
     service_status = {}
+    health = await check_all_services_health()
     
     for service_name, service_config in SERVICES.items():
         service_status[service_name] = {
             'url': service_config['url'],
-            'healthy': await check_service_health(service_name, service_config)
+            'healthy': health[service_name]
         }
     
     overall_health = any(status['healthy'] for status in service_status.values())
@@ -296,8 +354,9 @@ async def upload_pdf(
     logger.info(f"POST /api/generate-lesson/ received from {request.client.host}")
     target_url = f"{SERVICES['lesson-service']['url']}/api/generate-lesson/"
     
-    # Prepare file for upload
-    files = {'pdf_file': (pdf_file.filename, await pdf_file.read(), pdf_file.content_type)}
+    # Pass the spooled upload file through so httpx streams it in chunks
+    # instead of holding a second full copy of the PDF in memory
+    files = {'pdf_file': (pdf_file.filename, pdf_file.file, pdf_file.content_type)}
     
     # Prepare form data
     form_data = {
@@ -343,6 +402,79 @@ async def delete_conversation(conversation_id: str, request: Request):
     
     return await proxy_request(target_url, 'DELETE', dict(request.headers))
 
+# ============================================================================
+# BATCH ROUTE
+# ============================================================================
+
+BATCH_METHODS = {'GET', 'POST', 'PUT', 'DELETE'}
+MAX_BATCH_CALLS = 20
+
+async def run_batch_call(call: Dict, headers: Dict) -> Dict:
+    """Run a single call of a batch request against its service."""
+    path = call.get('path')
+    method = str(call.get('method', 'GET')).upper()
+    
+    # Only gateway routes are reachable - the path must be absolute so it can't
+    # change the target host, and may not climb out of its route prefix
+    if not isinstance(path, str) or not path.startswith('/') or '..' in path.split('/'):
+        return {'status': 400, 'body': {'error': "Each call needs an absolute 'path'"}}
+    
+    service_name, service_config = get_service_for_route(path)
+    if not service_config or call.get('service') not in (None, service_name):
+        return {'status': 404, 'body': {'error': f"No service found for path: {path}"}}
+    if method not in BATCH_METHODS:
+        return {'status': 405, 'body': {'error': 'Method not supported'}}
+    if not await check_service_health(service_name, service_config):
+        return {'status': 503, 'body': {'error': f"Service {service_name} is unavailable"}}
+    
+    target_url = f"{service_config['url']}{path}"
+    try:
+        response = await http_client.request(
+            method,
+            target_url,
+            headers=headers,
+            params=call.get('query'),
+            json=call.get('body') if method in ('POST', 'PUT') else None
+        )
+    except httpx.TimeoutException:
+        logger.error(f"Batch request timeout to {target_url}")
+        return {'status': 504, 'body': {'error': 'Service timeout'}}
+    except httpx.ConnectError:
+        logger.error(f"Batch connection error to {target_url}")
+        await recheck_service_health(target_url)
+        return {'status': 503, 'body': {'error': f"Service {service_name} is unavailable"}}
+    
+    try:
+        body = response.json()
+    except ValueError:
+        body = response.text
+    return {'status': response.status_code, 'body': body}
+
+@app.post('/api/batch')
+async def batch_proxy(request: Request):
+    """Run several small service calls in one round trip.
+    
+    Body: {"calls": [{"service", "method", "path", "body", "query"}, ...]} - the
+    service is resolved from the path like any other gateway route; "service" is
+    optional and must match it when given. The calls run concurrently with the
+    client's headers and the responses come back in the same order.
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Batch body must be valid JSON")
+    calls = payload.get('calls') if isinstance(payload, dict) else None
+    
+    if not isinstance(calls, list) or not calls or not all(isinstance(call, dict) for call in calls):
+        raise HTTPException(status_code=400, detail="Batch body must contain a non-empty 'calls' list of objects")
+    if len(calls) > MAX_BATCH_CALLS:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {MAX_BATCH_CALLS} calls")
+    
+    logger.info(f"Proxying batch of {len(calls)} calls")
+    headers = filter_proxy_headers(dict(request.headers))
+    responses = await asyncio.gather(*(run_batch_call(call, headers) for call in calls))
+    return {'responses': responses}
+
 # ============================================================================
 # GENERIC PROXY ROUTES
 # ============================================================================
@@ -363,7 +495,7 @@ async def generic_proxy(path: str, request: Request):
     target_url = f"{service_config['url']}{full_path}"
     
     # Handle request data
-    data = None
+    body = None
     files = None
     form_data = None
     params = dict(request.query_params) if request.query_params else None
@@ -376,19 +508,16 @@ async def generic_proxy(path: str, request: Request):
             files = {}
             form_data = {}
             for key, value in form.items():
-                if hasattr(value, 'read'):  # It's a file
-                    files[key] = (value.filename, await value.read(), value.content_type)
+                if hasattr(value, 'read'):  # It's a file - streamed from its spooled temp file
+                    files[key] = (value.filename, value.file, value.content_type)
                 else:
                     form_data[key] = value
         else:
-            # Handle JSON data
-            try:
-                data = await request.json()
-            except:
-                data = None
+            # Forward the JSON body as received - the target service parses it
+            body = await request.body()
     
     logger.info(f"Proxying {request.method} request to {service_name}: {full_path}")
-    return await proxy_request(target_url, request.method, dict(request.headers), json_data=data, form_data=form_data, files=files, params=params)
+    return await proxy_request(target_url, request.method, dict(request.headers), form_data=form_data, files=files, params=params, content=body)
 
 # ============================================================================
 # SERVICE DISCOVERY
@@ -398,12 +527,13 @@ async def generic_proxy(path: str, request: Request):
 async def list_services(request: Request):
     """List all available services and their status."""
     service_info = {}
+    health = await check_all_services_health()
     
     for service_name, service_config in SERVICES.items():
         service_info[service_name] = {
             'url': service_config['url'],
             'routes': service_config['routes'],
-            'healthy': await check_service_health(service_name, service_config)
+            'healthy': health[service_name]
         }
     
     return {
@@ -433,7 +563,7 @@ async def check_specific_service_health_endpoint(service_name: str):
 
 @app.on_event("startup")
 async def startup_event():
-    """Log startup information."""
+    """Log startup information and warm up connections to the services."""
     logger.info("=" * 60)
     logger.info("Starting GnyanSetu API Gateway (FastAPI) on port 8000")
     logger.info("=" * 60)
@@ -441,6 +571,13 @@ async def startup_event():
     for service_name, config in SERVICES.items():
         logger.info(f"  {service_name}: {config['url']} -> {config['routes']}")
     logger.info("=" * 60)
+    
+    # Probe every service once so the first proxied requests reuse pooled
+    # connections instead of paying for the TCP handshake. Services started
+    # alongside the gateway may still be booting, so don't cache them as down.
+    health = await check_all_services_health(use_cache=False)
+    for service_name, is_healthy in health.items():
+        logger.info(f"  {service_name}: {'reachable' if is_healthy else 'not reachable yet'}")
 
 @app.on_event("shutdown")
 async def shutdown_event():
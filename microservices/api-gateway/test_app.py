@@ -0,0 +1,34 @@
+# Tests for the Flask API Gateway proxy error handling
+# Run from this directory: python -m unittest test_app
+
+import unittest
+from unittest import mock
+
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import ReadTimeoutError
+
+import app as gateway
+
+
+class ProxyRequestRetryTest(unittest.TestCase):
+    """The shared session's retry policy must keep timeouts reported as timeouts."""
+
+    def proxy_get(self):
+        with gateway.app.test_request_context('/api/lessons/'):
+            response, status = gateway.proxy_request('http://127.0.0.1:8003/api/lessons/', 'GET')
+            return response.get_json(), status
+
+    def test_get_read_timeout_returns_504_without_retrying(self):
+        def read_timeout(pool, conn, method, url, **kwargs):
+            raise ReadTimeoutError(pool, url, 'Read timed out.')
+
+        with mock.patch.object(HTTPConnectionPool, '_make_request', autospec=True, side_effect=read_timeout) as make_request:
+            body, status = self.proxy_get()
+
+        self.assertEqual(status, 504)
+        self.assertEqual(body, {'error': 'Service timeout'})
+        self.assertEqual(make_request.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',  # ETag + 304 Not Modified for unchanged GET responses
     'django.contrib.sessions.middleware.SessionMiddleware', 
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,6 +77,18 @@ MONGODB_SETTINGS = {
     'db': config('MONGODB_NAME', default='Gnyansetu_Lessons'),
 }
 
+# Cache - file based so generated lessons survive restarts and are shared between workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'TIMEOUT': config('LESSON_CACHE_TIMEOUT', default=86400, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': 500,
+        },
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -2,15 +2,21 @@
 import logging
 import json
 import base64
+import hashlib
 from io import BytesIO
 from PIL import Image
 import google.generativeai as genai
 from django.conf import settings
+from django.core.cache import cache
 from datetime import datetime
 from .visualization_extractor import VisualizationExtractor
 
 logger = logging.getLogger(__name__)
 
+# Fields generate_image_explanations adds to each PDF image - cached lessons keep
+# these instead of the base64 image data, which the caller always has anyway
+IMAGE_EXPLANATION_FIELDS = ('id', 'description', 'teaching_points', 'narration', 'explanation')
+
 class LessonGenerator:
     """AI-powered lesson generation using Google Gemini"""
     
@@ -130,7 +136,19 @@ Focus on educational value and how this image supports the lesson."""
         logger.info(f" Explained {len(explained_images)} images")
         return explained_images
     
-    def generate_lesson(self, pdf_text, images_ocr_text="", lesson_type="interactive", user_context=None, pdf_images=None):
+    @staticmethod
+    def _lesson_cache_key(full_content, lesson_type, pdf_images=None):
+        """Cache key for a generated lesson - a hash of everything sent to Gemini"""
+        digest = hashlib.sha256()
+        digest.update(lesson_type.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(full_content.encode('utf-8'))
+        for img in pdf_images or []:
+            digest.update(b'\0')
+            digest.update((img.get('image_data') or '').encode('utf-8'))
+        return f"lesson:{digest.hexdigest()}"
+    
+    def generate_lesson(self, pdf_text, images_ocr_text="", lesson_type="interactive", user_context=None, pdf_images=None, use_cache=True):
         """
         Generate comprehensive lesson from PDF content with images
         
@@ -140,6 +158,8 @@ Focus on educational value and how this image supports the lesson."""
             lesson_type (str): Type of lesson to generate
             user_context (dict): Additional context about user preferences
             pdf_images (list): List of extracted PDF images with base64 data
+            use_cache (bool): Reuse a cached lesson for the same content; pass False to
+                force a fresh generation (the new lesson still replaces the cached one)
         
         Returns:
             dict: Generated lesson with title and content
@@ -153,6 +173,18 @@ Focus on educational value and how this image supports the lesson."""
             if images_ocr_text:
                 full_content += f"\n\n--- Content from Images ---\n{images_ocr_text}"
             
+            # Same PDF content already generated - skip the Gemini calls
+            cache_key = self._lesson_cache_key(full_content, lesson_type, pdf_images)
+            cached_result = cache.get(cache_key) if use_cache else None
+            if cached_result:
+                logger.info(f" Using cached {lesson_type} lesson: {cached_result['title']}")
+                for img, explanation in zip(pdf_images or [], cached_result.get('image_explanations', [])):
+                    img.update(explanation)
+                return self._build_lesson_result(
+                    cached_result['title'], cached_result['content'], lesson_type,
+                    cached_result['generated_at'], True, pdf_images
+                )
+            
             # Log image availability
             if pdf_images and len(pdf_images) > 0:
                 logger.info(f"� Processing lesson with {len(pdf_images)} images from PDF")
@@ -162,7 +194,7 @@ Focus on educational value and how this image supports the lesson."""
             # Extract meaningful title from content (first line or heading)
             lesson_title = "Educational Lesson"  # Default fallback
             try:
-                lines = full_content.split('\n')
+                lines = full_content.split('\n', 20)  # Only the first 20 lines are needed
                 for line in lines[:20]:  # Check first 20 lines
                     clean_line = line.strip()
                     if clean_line and len(clean_line) > 10 and len(clean_line) < 150:
@@ -176,57 +208,80 @@ Focus on educational value and how this image supports the lesson."""
             
             # Generate lesson content based on type (WITH IMAGES)
             if lesson_type == "interactive":
-                lesson_content = self._generate_interactive_lesson_with_images(
+                lesson_content, ai_generated = self._generate_interactive_lesson_with_images(
                     full_content, lesson_title, pdf_images
                 )
             elif lesson_type == "quiz":
-                lesson_content = self._generate_quiz_lesson(full_content, lesson_title)
+                lesson_content, ai_generated = self._generate_quiz_lesson(full_content, lesson_title)
             elif lesson_type == "summary":
-                lesson_content = self._generate_summary_lesson(full_content, lesson_title)
+                lesson_content, ai_generated = self._generate_summary_lesson(full_content, lesson_title)
             elif lesson_type == "detailed":
-                lesson_content = self._generate_detailed_lesson(full_content, lesson_title)
+                lesson_content, ai_generated = self._generate_detailed_lesson(full_content, lesson_title)
             else:
-                lesson_content = self._generate_interactive_lesson_with_images(
+                lesson_content, ai_generated = self._generate_interactive_lesson_with_images(
                     full_content, lesson_title, pdf_images
                 )
             
             logger.info(f"Generated {lesson_type} lesson: {lesson_title}")
             
-            # Extract visualization JSON if present
-            visualization_data = VisualizationExtractor.extract_visualization_json(lesson_content)
-            
-            # Replace image placeholders with actual base64 data
-            if visualization_data and pdf_images:
-                visualization_data = VisualizationExtractor.replace_pdf_image_placeholders(
-                    visualization_data, pdf_images
-                )
-                logger.info(f" Replaced image placeholders with actual image data")
-            
-            result = {
-                'title': lesson_title,
-                'content': lesson_content,
-                'type': lesson_type,
-                'generated_at': datetime.utcnow().isoformat(),
-                'success': True,
-                'pdf_images': pdf_images  # Include images in result
-            }
-            
-            # Add visualization if extracted
-            if visualization_data:
-                result['visualization'] = visualization_data
-                logger.info(f" Visualization data extracted: {len(visualization_data.get('scenes', []))} scenes")
+            result = self._build_lesson_result(
+                lesson_title, lesson_content, lesson_type,
+                datetime.utcnow().isoformat(), ai_generated, pdf_images
+            )
             
+            # Only cache real AI output - a fallback lesson should be retried next time.
+            # The images are left out: the visualization is rebuilt from the content and
+            # the caller's images on a hit, so only their explanations need keeping.
+            if ai_generated:
+                cache.set(cache_key, {
+                    'title': lesson_title,
+                    'content': lesson_content,
+                    'generated_at': result['generated_at'],
+                    'image_explanations': [
+                        {field: img[field] for field in IMAGE_EXPLANATION_FIELDS if field in img}
+                        for img in pdf_images or []
+                    ]
+                })
             return result
             
         except Exception as e:
             logger.error(f"Error generating lesson: {e}")
             return self._fallback_lesson(pdf_text, error_msg=str(e))
     
+    def _build_lesson_result(self, lesson_title, lesson_content, lesson_type, generated_at, ai_generated, pdf_images):
+        """Assemble the lesson result, extracting its visualization and filling in PDF images"""
+        # Extract visualization JSON if present
+        visualization_data = VisualizationExtractor.extract_visualization_json(lesson_content)
+        
+        # Replace image placeholders with actual base64 data
+        if visualization_data and pdf_images:
+            visualization_data = VisualizationExtractor.replace_pdf_image_placeholders(
+                visualization_data, pdf_images
+            )
+            logger.info(f" Replaced image placeholders with actual image data")
+        
+        result = {
+            'title': lesson_title,
+            'content': lesson_content,
+            'type': lesson_type,
+            'generated_at': generated_at,
+            'success': ai_generated,
+            'fallback': not ai_generated,
+            'pdf_images': pdf_images  # Include images in result
+        }
+        
+        # Add visualization if extracted
+        if visualization_data:
+            result['visualization'] = visualization_data
+            logger.info(f" Visualization data extracted: {len(visualization_data.get('scenes', []))} scenes")
+        
+        return result
+    
     def _generate_lesson_title(self, content):
         """Generate an appropriate title for the lesson"""
         try:
             # More aggressive content cleaning for safety filters
-            content_preview = content[:1000] if len(content) > 1000 else content
+            content_preview = content[:1000]
             
             # Clean the content to avoid safety filter issues
             import re
@@ -625,7 +680,10 @@ Analyze and return ONLY this JSON structure (no markdown, no explanation):
             return self._create_basic_lesson(content, title)
     
     def _generate_interactive_lesson_with_images(self, content, title, pdf_images=None):
-        """Generate interactive lesson with vision understanding of PDF images - WITH SMART RETRY"""
+        """
+        Generate interactive lesson with vision understanding of PDF images - WITH SMART RETRY
+        Returns (lesson_content, ai_generated) - ai_generated is False for the basic fallback lesson
+        """
         
         # ATTEMPT 1: Try with ONE small image (300x300)
         logger.info("� ATTEMPT 1: Generating with 1 compressed image (300px)")
@@ -636,7 +694,7 @@ Analyze and return ONLY this JSON structure (no markdown, no explanation):
             if "```visualization" not in result:
                 logger.warning(" No visualization JSON in generated content, adding fallback")
                 result += self._generate_fallback_visualization(title, pdf_images, content)
-            return result
+            return result, True
         
         # ATTEMPT 2: Try without any images (text-only)
         logger.warning(" ATTEMPT 2: Image generation failed, trying TEXT-ONLY")
@@ -646,13 +704,13 @@ Analyze and return ONLY this JSON structure (no markdown, no explanation):
             # Add PDF images to fallback visualization
             if "```visualization" not in result:
                 result += self._generate_fallback_visualization(title, pdf_images, content)
-            return result
+            return result, True
         
         # ATTEMPT 3: Complete fallback
         logger.error(" ATTEMPT 3: All attempts failed, using complete fallback")
         fallback = self._create_basic_lesson(content, title)
         fallback += self._generate_fallback_visualization(title, pdf_images, content)
-        return fallback
+        return fallback, False
     
     def _try_generate_text_only(self, content, title):
         """Try text-only generation (NO IMAGES) - calls _try_generate_with_images with no images"""
@@ -1132,11 +1190,14 @@ Create 4 scenes with 10-15 shapes each, all animated beautifully!""")
                     max_output_tokens=self.max_tokens
                 )
             )
-            return self._safe_extract_text(response, self._create_basic_lesson(content, title))
+            text = self._safe_extract_text(response, None)
+            if text:
+                return text, True
+            return self._create_basic_lesson(content, title), False
             
         except Exception as e:
             logger.error(f"Error generating quiz lesson: {e}")
-            return self._create_basic_lesson(content, title)
+            return self._create_basic_lesson(content, title), False
     
     def _generate_summary_lesson(self, content, title):
         """Generate a concise summary lesson"""
@@ -1204,11 +1265,14 @@ Create 4 scenes with 10-15 shapes each, all animated beautifully!""")
                     max_output_tokens=4000  # Shorter for summaries
                 )
             )
-            return self._safe_extract_text(response, self._create_basic_lesson(content, title))
+            text = self._safe_extract_text(response, None)
+            if text:
+                return text, True
+            return self._create_basic_lesson(content, title), False
             
         except Exception as e:
             logger.error(f"Error generating summary lesson: {e}")
-            return self._create_basic_lesson(content, title)
+            return self._create_basic_lesson(content, title), False
     
     def _generate_detailed_lesson(self, content, title):
         """Generate a comprehensive detailed lesson"""
@@ -1297,11 +1361,14 @@ Create 4 scenes with 10-15 shapes each, all animated beautifully!""")
                     max_output_tokens=self.max_tokens
                 )
             )
-            return self._safe_extract_text(response, self._create_basic_lesson(content, title))
+            text = self._safe_extract_text(response, None)
+            if text:
+                return text, True
+            return self._create_basic_lesson(content, title), False
             
         except Exception as e:
             logger.error(f"Error generating detailed lesson: {e}")
-            return self._create_basic_lesson(content, title)
+            return self._create_basic_lesson(content, title), False
     
     def _create_basic_lesson(self, content, title):
         """Create a structured lesson from PDF content when AI generation fails"""
@@ -1392,7 +1459,7 @@ This comprehensive lesson will guide you through understanding the key concepts
         title = "Study Material"
         
         # Try to extract a title from content
-        lines = content.strip().split('\n')
+        lines = content.strip().split('\n', 10)
         for line in lines[:10]:
             if line.strip() and len(line.strip()) < 100:
                 title = line.strip()
@@ -1420,7 +1487,7 @@ This comprehensive lesson will guide you through understanding the key concepts
         print(" Starting quiz generation from lesson content...")
         
         # Limit content length to avoid token limits
-        content_preview = lesson_content[:2000] if len(lesson_content) > 2000 else lesson_content
+        content_preview = lesson_content[:2000]
         
         prompt = f"""
 Generate a quiz with EXACTLY 5 multiple choice questions based on this lesson.
@@ -1608,7 +1675,7 @@ Generate EXACTLY 5 questions following this format. Ensure proper JSON syntax wi
         print("� Starting notes generation from lesson content...")
         
         # Limit content length to avoid token limits
-        content_preview = lesson_content[:2000] if len(lesson_content) > 2000 else lesson_content
+        content_preview = lesson_content[:2000]
         
         prompt = f"""
 Generate structured study notes based on this lesson.
@@ -4,22 +4,35 @@
 from pymongo import MongoClient
 from datetime import datetime
 from bson import ObjectId
+from time import monotonic
 import logging
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Health/monitoring results are cached so frequent health probes don't hit MongoDB every time
+CONNECTION_CHECK_TTL = 5  # seconds
+DATABASE_STATS_TTL = 60  # seconds
+monitoring_cache = {}
+
 def check_database_connection():
-    """Check if database connection is working"""
+    """Check if database connection is working (cached for CONNECTION_CHECK_TTL seconds)"""
+    cached = monitoring_cache.get('connection')
+    if cached and monotonic() - cached[1] < CONNECTION_CHECK_TTL:
+        return cached[0]
+    
     try:
         if client is None:
             return False, "MongoDB client not initialized"
         
         # Test the connection
         client.admin.command('ismaster')
-        return True, "Connected to MongoDB successfully"
+        result = True, "Connected to MongoDB successfully"
     except Exception as e:
-        return False, f"MongoDB connection failed: {str(e)}"
+        result = False, f"MongoDB connection failed: {str(e)}"
+    
+    monitoring_cache['connection'] = (result, monotonic())
+    return result
     
 def get_connection_info():
     """Get detailed connection information"""
@@ -37,7 +50,18 @@ def get_connection_info():
         return {"status": "error", "error": str(e)}
 
 def get_database_stats():
-    """Get database statistics for monitoring"""
+    """Get database statistics for monitoring (cached for DATABASE_STATS_TTL seconds)"""
+    cached = monitoring_cache.get('stats')
+    if cached and monotonic() - cached[1] < DATABASE_STATS_TTL:
+        return cached[0]
+    
+    stats = _collect_database_stats()
+    if stats["status"] == "connected":
+        monitoring_cache['stats'] = (stats, monotonic())
+    return stats
+
+def _collect_database_stats():
+    """Count the documents in each collection"""
     try:
         if client is None or db is None:
             return {
@@ -55,17 +79,17 @@ def get_database_stats():
         
         # Get stats for each collection
         if pdf_data_collection is not None:
-            pdf_count = pdf_data_collection.count_documents({})
+            pdf_count = pdf_data_collection.estimated_document_count()
             stats["collections"]["pdf_data"] = pdf_count
             stats["total_documents"] += pdf_count
         
         if lessons_collection is not None:
-            lessons_count = lessons_collection.count_documents({})
+            lessons_count = lessons_collection.estimated_document_count()
             stats["collections"]["lessons"] = lessons_count
             stats["total_documents"] += lessons_count
         
         if user_histories_collection is not None:
-            history_count = user_histories_collection.count_documents({})
+            history_count = user_histories_collection.estimated_document_count()
             stats["collections"]["user_histories"] = history_count
             stats["total_documents"] += history_count
         
@@ -197,11 +221,11 @@ class LessonModel:
             return str(document['_id'])  # Return mock ID as fallback
     
     @staticmethod
-    def get_by_id(lesson_id):
-        """Get lesson by ID"""
+    def get_by_id(lesson_id, projection=None):
+        """Get lesson by ID, optionally limited to the fields in projection"""
         try:
             if lessons_collection is not None:
-                return lessons_collection.find_one({'_id': ObjectId(lesson_id)})
+                return lessons_collection.find_one({'_id': ObjectId(lesson_id)}, projection)
             else:
                 logger.warning("MongoDB unavailable, returning None")
                 return None
@@ -1,12 +1,15 @@
 ﻿# Django Views for Lesson Service API
+import asyncio
 import logging
 import json
+import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import JsonResponse
+from django.http import HttpResponseNotAllowed, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
@@ -22,29 +25,46 @@ logger = logging.getLogger(__name__)
 pdf_processor = PDFProcessor()
 lesson_generator = LessonGenerator()
 
+# Lesson fields read by check_quiz_notes_status
+QUIZ_NOTES_STATUS_FIELDS = {
+    'quiz_notes_status': 1,
+    'quiz_notes_generated_at': 1,
+    'quiz_data.questions': 1,
+    'notes_data.sections': 1,
+}
+
+# Set when a lesson's background quiz/notes generation finishes, so status
+# requests with ?wait=N can block until then instead of polling
+quiz_notes_done = {}
+QUIZ_NOTES_MAX_WAIT = 30  # seconds
+
 def generate_quiz_and_notes_async(lesson_id, lesson_content, lesson_title):
     """
     Background thread to generate quiz and notes while teaching is happening.
     This runs asynchronously so teaching can start immediately.
     """
     try:
-        print("\n" + "="*60)
-        print(f" ASYNC: Starting quiz and notes generation for lesson: {lesson_id}")
-        print("="*60)
-        
-        # Generate quiz data
-        print(" ASYNC: Generating quiz...")
-        quiz_data = lesson_generator.generate_quiz_data(
-            lesson_content=lesson_content,
-            lesson_title=lesson_title
-        )
-        
-        # Generate notes data
-        print("� ASYNC: Generating notes...")
-        notes_data = lesson_generator.generate_notes_data(
-            lesson_content=lesson_content,
-            lesson_title=lesson_title
-        )
+        sys.stdout.write("\n".join([
+            "\n" + "="*60,
+            f" ASYNC: Starting quiz and notes generation for lesson: {lesson_id}",
+            "="*60
+        ]) + "\n")
+        
+        # Quiz and notes are independent Gemini calls - generate them concurrently
+        print(" ASYNC: Generating quiz and notes...")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            quiz_future = pool.submit(
+                lesson_generator.generate_quiz_data,
+                lesson_content=lesson_content,
+                lesson_title=lesson_title
+            )
+            notes_future = pool.submit(
+                lesson_generator.generate_notes_data,
+                lesson_content=lesson_content,
+                lesson_title=lesson_title
+            )
+            quiz_data = quiz_future.result()
+            notes_data = notes_future.result()
         
         # Update the lesson document with quiz and notes data
         if lessons_collection is not None:
@@ -60,13 +80,16 @@ def generate_quiz_and_notes_async(lesson_id, lesson_content, lesson_title):
                 }
             )
             
-            print("="*60)
-            print("� ASYNC Generation Complete:")
-            print(f"    Lesson ID: {lesson_id}")
-            print(f"    Quiz: {len(quiz_data.get('questions', []))} questions")
-            print(f"    Notes: {len(notes_data.get('sections', []))} sections")
-            print(f"    Updated in database: {update_result.modified_count} document(s)")
-            print("="*60 + "\n")
+            # Single write so reports from concurrent background threads don't interleave
+            sys.stdout.write("\n".join([
+                "="*60,
+                "� ASYNC Generation Complete:",
+                f"    Lesson ID: {lesson_id}",
+                f"    Quiz: {len(quiz_data.get('questions', []))} questions",
+                f"    Notes: {len(notes_data.get('sections', []))} sections",
+                f"    Updated in database: {update_result.modified_count} document(s)",
+                "="*60 + "\n"
+            ]) + "\n")
         else:
             print(" ASYNC: Cannot update - MongoDB not available")
             
@@ -85,6 +108,10 @@ def generate_quiz_and_notes_async(lesson_id, lesson_content, lesson_title):
                     }
                 }
             )
+    finally:
+        done = quiz_notes_done.pop(lesson_id, None)
+        if done is not None:
+            done.set()
 
 
 @api_view(['GET'])
@@ -217,10 +244,13 @@ def process_pdf_and_generate_lesson(request):
         
         # Start async generation of quiz and notes in background thread
         # This allows teaching to start immediately while quiz/notes are being generated
-        print("\n� Starting ASYNC quiz and notes generation...")
-        print("� Teaching can begin immediately!")
-        print("� Quiz and notes will be generated in the background...\n")
+        sys.stdout.write("\n".join([
+            "\n� Starting ASYNC quiz and notes generation...",
+            "� Teaching can begin immediately!",
+            "� Quiz and notes will be generated in the background...\n"
+        ]) + "\n")
         
+        quiz_notes_done[lesson_id] = threading.Event()
         thread = threading.Thread(
             target=generate_quiz_and_notes_async,
             args=(lesson_id, lesson_result['content'], lesson_result['title']),
@@ -315,20 +345,17 @@ def get_lesson_detail(request, lesson_id):
             'success': False
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-@api_view(['GET'])
-def check_quiz_notes_status(request, lesson_id):
-    """
-    Check if quiz and notes have been generated for a lesson.
-    Used by frontend to poll until generation is complete.
-    """
+def get_quiz_notes_status(lesson_id):
+    """Build the quiz/notes status response body and HTTP status for a lesson"""
     try:
-        lesson = LessonModel.get_by_id(lesson_id)
+        # Polled repeatedly, so skip the lesson content and fetch only the status fields
+        lesson = LessonModel.get_by_id(lesson_id, QUIZ_NOTES_STATUS_FIELDS)
         
         if lesson is None:
-            return Response({
+            return {
                 'error': 'Lesson not found',
                 'success': False
-            }, status=status.HTTP_404_NOT_FOUND)
+            }, status.HTTP_404_NOT_FOUND
         
         quiz_notes_status = lesson.get('quiz_notes_status', 'unknown')
         has_quiz = bool(lesson.get('quiz_data', {}).get('questions'))
@@ -336,7 +363,7 @@ def check_quiz_notes_status(request, lesson_id):
         
         is_ready = has_quiz and has_notes
         
-        return Response({
+        return {
             'success': True,
             'lesson_id': lesson_id,
             'quiz_notes_status': quiz_notes_status,
@@ -344,14 +371,41 @@ def check_quiz_notes_status(request, lesson_id):
             'has_quiz': has_quiz,
             'has_notes': has_notes,
             'generated_at': lesson.get('quiz_notes_generated_at', None)
-        })
+        }, status.HTTP_200_OK
         
     except Exception as e:
         logger.error(f"Error checking quiz/notes status: {e}")
-        return Response({
+        return {
             'error': 'Failed to retrieve lesson',
             'success': False
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        }, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+async def check_quiz_notes_status(request, lesson_id):
+    """
+    Check if quiz and notes have been generated for a lesson.
+    Used by frontend to poll until generation is complete. Pass ?wait=<seconds>
+    to hold the request open until generation finishes or the wait runs out.
+    
+    Async so a waiting request doesn't hold the thread Django runs sync views on -
+    the wait and the Mongo read happen in worker threads.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        return JsonResponse({
+            'error': 'wait must be a number of seconds',
+            'success': False
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    done = quiz_notes_done.get(lesson_id)
+    if wait > 0 and done is not None:
+        await asyncio.to_thread(done.wait, min(wait, QUIZ_NOTES_MAX_WAIT))
+    
+    body, status_code = await asyncio.to_thread(get_quiz_notes_status, lesson_id)
+    return JsonResponse(body, status=status_code)
 
 @api_view(['GET'])
 def get_user_history(request, user_id):
@@ -418,7 +472,8 @@ def regenerate_lesson(request, lesson_id):
             pdf_text=pdf_data['text_content'],
             images_ocr_text=images_ocr_text,
             lesson_type=new_lesson_type,
-            user_context={'user_id': lesson['user_id']}
+            user_context={'user_id': lesson['user_id']},
+            use_cache=False  # Regenerating must produce a new lesson, not the cached one
         )
         
         # Create new lesson
@@ -6,6 +6,7 @@ Extracts and validates visualization JSON from LLM-generated lesson content
 import json
 import re
 import logging
+from itertools import islice
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +33,7 @@ class VisualizationExtractor:
                 # DEBUG: Show what patterns we found
                 logger.warning("No visualization block found in lesson content")
                 if '```' in lesson_content:
-                    logger.info(f"� DEBUG: Found ``` markers at positions: {[i for i, c in enumerate(lesson_content) if lesson_content[i:i+3] == '```'][:5]}")
+                    logger.info(f"� DEBUG: Found ``` markers at positions: {[m.start() for m in islice(re.finditer('```', lesson_content), 5)]}")
                 if 'visualization' in lesson_content.lower():
                     logger.info(f"� DEBUG: Found 'visualization' text in content")
                 return None
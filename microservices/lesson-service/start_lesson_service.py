@@ -15,18 +15,20 @@ init(autoreset=True)
 
 def print_startup_banner():
     """Print colorful startup banner"""
-    print(f"\n{Fore.CYAN}{'='*80}{Style.RESET_ALL}")
-    print(f"{Fore.WHITE}{Back.GREEN}  GNYANSETU LESSON SERVICE - AI LESSON GENERATOR {Style.RESET_ALL}")
-    print(f"{Fore.CYAN}{'='*80}{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}� Advanced PDF Processing with OCR")
-    print(f"{Fore.GREEN} AI-Powered Lesson Generation using Google Gemini")
-    print(f"{Fore.GREEN}� User-specific Lesson History & Management")
-    print(f"{Fore.GREEN} Multiple Lesson Types: Interactive, Quiz, Summary, Detailed")
-    print(f"{Fore.CYAN}{'='*80}{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW} Starting on: http://localhost:8003")
-    print(f"{Fore.YELLOW}� Health Check: http://localhost:8003/health/")
-    print(f"{Fore.YELLOW}� API Docs: http://localhost:8003/api/")
-    print(f"{Fore.CYAN}{'='*80}{Style.RESET_ALL}\n")
+    sys.stdout.write("\n".join([
+        f"\n{Fore.CYAN}{'='*80}{Style.RESET_ALL}",
+        f"{Fore.WHITE}{Back.GREEN}  GNYANSETU LESSON SERVICE - AI LESSON GENERATOR {Style.RESET_ALL}",
+        f"{Fore.CYAN}{'='*80}{Style.RESET_ALL}",
+        f"{Fore.GREEN}� Advanced PDF Processing with OCR",
+        f"{Fore.GREEN} AI-Powered Lesson Generation using Google Gemini",
+        f"{Fore.GREEN}� User-specific Lesson History & Management",
+        f"{Fore.GREEN} Multiple Lesson Types: Interactive, Quiz, Summary, Detailed",
+        f"{Fore.CYAN}{'='*80}{Style.RESET_ALL}",
+        f"{Fore.YELLOW} Starting on: http://localhost:8003",
+        f"{Fore.YELLOW}� Health Check: http://localhost:8003/health/",
+        f"{Fore.YELLOW}� API Docs: http://localhost:8003/api/",
+        f"{Fore.CYAN}{'='*80}{Style.RESET_ALL}\n",
+    ]) + "\n")
 
 def check_environment():
     """Check if all required environment variables and dependencies are available"""
@@ -47,41 +47,35 @@ echo.
 REM Start API Gateway (Port 8000) - Central routing service
 echo [1/5] Starting API Gateway (FastAPI) on port 8000...
 start "API Gateway" cmd /k "cd /d "%BASE_DIR%\api-gateway" && echo Starting FastAPI API Gateway... && python -m uvicorn app_fastapi:app --host 0.0.0.0 --port 8000 --reload"
-timeout /t 3 /nobreak >nul
 echo ✓ API Gateway started
 
 REM Start Django User Authentication Service (Port 8002)
 echo [2/5] Starting Django User Authentication Service on port 8002...
 start "Django User Service" cmd /k "cd /d "%BASE_DIR%\user-service-django" && start_django_service.bat"
-timeout /t 3 /nobreak >nul
 echo ✓ User Service started
 
 REM Start Lesson Service (Port 8003) - AI Lesson Generation with Django
 echo [3/5] Starting Lesson Service on port 8003...
 cd /d "%BASE_DIR%\lesson-service"
 start "Lesson Service - AI Lesson Generator" cmd /k "cd /d "e:\Project" && venv\Scripts\activate && cd /d "%BASE_DIR%\lesson-service" && echo LESSON SERVICE - AI LESSON GENERATION && echo Google Gemini AI + Advanced PDF Processing && echo User-specific Lesson History && echo. && python start_lesson_service.py"
-timeout /t 3 /nobreak >nul
 echo ✓ Lesson Service started
 
 REM Start Teaching Service (Port 8004) - Real-Time Interactive Teaching
 echo [4/5] Starting Teaching Service on port 8004...
 cd /d "%BASE_DIR%\teaching-service"
 start "Teaching Service - Real-Time AI Teacher" cmd /k "cd /d "e:\Project" && venv\Scripts\activate && cd /d "%BASE_DIR%\teaching-service" && echo TEACHING SERVICE - REAL-TIME AI TEACHER && echo Django Channels + WebSockets + Natural Voice && echo Interactive Teaching with Konva.js Integration && echo WebSocket URL: ws://localhost:8004/ws/teaching/ && echo. && python start_teaching_service.py"
-timeout /t 3 /nobreak >nul
 echo ✓ Teaching Service started
 
 REM Start Quiz & Notes Service (Port 8005) - AI Quiz & Notes Generation
 echo [5/6] Starting Quiz ^& Notes Service on port 8005...
 cd /d "%BASE_DIR%\quiz-notes-service"
 start "Quiz & Notes Service - AI Content Generator" cmd /k "cd /d "e:\Project" && venv\Scripts\activate && cd /d "%BASE_DIR%\quiz-notes-service" && echo QUIZ ^& NOTES SERVICE - AI CONTENT GENERATION && echo FastAPI + Google Gemini AI && echo Quiz Generation + Notes Generation + Results Tracking && echo. && python -m uvicorn main:app --host 0.0.0.0 --port 8005 --reload"
-timeout /t 3 /nobreak >nul
 echo ✓ Quiz ^& Notes Service started
 
 REM Start Visualization Service (Port 8006) - Dynamic Teaching Visuals
 echo [6/6] Starting Visualization Service on port 8006...
 cd /d "%BASE_DIR%\visualization-service"
 start "Visualization Service - Dynamic Teaching Visuals" cmd /k "cd /d "e:\Project" && venv\Scripts\activate && cd /d "%BASE_DIR%\visualization-service" && echo VISUALIZATION SERVICE - DYNAMIC TEACHING VISUALS && echo FastAPI + Gemini LLM + Subject-Specific Graphics && echo 9-Zone Coordinate System + Overlap Prevention && echo. && python -m uvicorn app:app --host 0.0.0.0 --port 8006 --reload"
-timeout /t 3 /nobreak >nul
 echo ✓ Visualization Service started
 
 echo.
@@ -97,18 +91,14 @@ echo Visualization Service: http://localhost:8006 (Dynamic Visuals)
 echo ========================================
 echo.
 
-REM Wait for services to initialize
+REM Health check backend services - each check retries until the service is up (max ~15s)
 echo Waiting for backend services to initialize...
-timeout /t 5 /nobreak >nul
-
-REM Health check backend services
-echo Performing backend health checks...
-curl -f http://localhost:8000/health >nul 2>&1 && echo ✓ API Gateway healthy || echo ❌ API Gateway not responding
-curl -f http://localhost:8002/api/v1/health/ >nul 2>&1 && echo ✓ User Service healthy || echo ❌ User Service not responding
-curl -f http://localhost:8003/health >nul 2>&1 && echo ✓ Lesson Service healthy || echo ❌ Lesson Service not responding
-curl -f http://localhost:8004/health >nul 2>&1 && echo ✓ Teaching Service healthy || echo ❌ Teaching Service not responding
-curl -f http://localhost:8005/health >nul 2>&1 && echo ✓ Quiz Notes Service healthy || echo ❌ Quiz Notes Service not responding
-curl -f http://localhost:8006/health >nul 2>&1 && echo ✓ Visualization Service healthy || echo ❌ Visualization Service not responding
+curl -f -s --retry 15 --retry-delay 1 --retry-connrefused http://localhost:8000/health >nul 2>&1 && echo ✓ API Gateway healthy || echo ❌ API Gateway not responding
+curl -f -s --retry 15 --retry-delay 1 --retry-connrefused http://localhost:8002/api/v1/health/ >nul 2>&1 && echo ✓ User Service healthy || echo ❌ User Service not responding
+curl -f -s --retry 15 --retry-delay 1 --retry-connrefused http://localhost:8003/health >nul 2>&1 && echo ✓ Lesson Service healthy || echo ❌ Lesson Service not responding
+curl -f -s --retry 15 --retry-delay 1 --retry-connrefused http://localhost:8004/health >nul 2>&1 && echo ✓ Teaching Service healthy || echo ❌ Teaching Service not responding
+curl -f -s --retry 15 --retry-delay 1 --retry-connrefused http://localhost:8005/health >nul 2>&1 && echo ✓ Quiz Notes Service healthy || echo ❌ Quiz Notes Service not responding
+curl -f -s --retry 15 --retry-delay 1 --retry-connrefused http://localhost:8006/health >nul 2>&1 && echo ✓ Visualization Service healthy || echo ❌ Visualization Service not responding
 
 echo.
 echo Starting Frontend Services...
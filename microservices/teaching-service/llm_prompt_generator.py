@@ -120,6 +120,15 @@ IMPORTANT:
 - Each scene should teach ONE clear concept
 """
 
+    # Validation tables for LLM responses - built once, checked with set operations
+    REQUIRED_SCENE_KEYS = frozenset({'scene_id', 'audio_text', 'elements'})
+    REQUIRED_ELEMENT_KEYS = frozenset({'type', 'zone', 'properties'})
+    VALID_ZONES = frozenset({
+        'top_left', 'top_center', 'top_right',
+        'center_left', 'center', 'center_right',
+        'bottom_left', 'bottom_center', 'bottom_right'
+    })
+
     @staticmethod
     def generate_teaching_prompt(
         lesson_content: str,
@@ -217,8 +226,8 @@ Generate the JSON visualization:"""
             "temperature": 0.8
         }
     
-    @staticmethod
-    def validate_llm_response(response: Dict) -> bool:
+    @classmethod
+    def validate_llm_response(cls, response: Dict) -> bool:
         """
         Validate LLM visualization response structure
         """
@@ -228,19 +237,16 @@ Generate the JSON visualization:"""
             
             for scene in response['scenes']:
                 # Required fields
-                if not all(key in scene for key in ['scene_id', 'audio_text', 'elements']):
+                if not cls.REQUIRED_SCENE_KEYS <= scene.keys():
                     return False
                 
                 # Validate elements
                 for elem in scene['elements']:
-                    if not all(key in elem for key in ['type', 'zone', 'properties']):
+                    if not cls.REQUIRED_ELEMENT_KEYS <= elem.keys():
                         return False
                     
                     # Check zone is valid
-                    valid_zones = ['top_left', 'top_center', 'top_right', 
-                                   'center_left', 'center', 'center_right',
-                                   'bottom_left', 'bottom_center', 'bottom_right']
-                    if elem['zone'] not in valid_zones:
+                    if elem['zone'] not in cls.VALID_ZONES:
                         return False
             
             return True
@@ -18,6 +18,36 @@ class TeachingConsumer(AsyncWebsocketConsumer):
     # Class-level storage for temporary sessions
     temp_sessions = {}
     
+    # Shared HTTP session for calls to the Lesson Service (keeps connections alive between lessons).
+    # It lives while any teaching connection is open and is closed when the last one ends.
+    lesson_service_session = None
+    active_channels = set()
+    
+    # Lesson generation can take minutes; the connect timeout catches a Lesson Service that is down
+    LESSON_SERVICE_TIMEOUT = 180  # seconds
+    LESSON_SERVICE_CONNECT_TIMEOUT = 2  # seconds
+    
+    @classmethod
+    def get_lesson_service_session(cls):
+        """Return the shared aiohttp session, creating it on first use"""
+        import aiohttp
+        
+        if cls.lesson_service_session is None or cls.lesson_service_session.closed:
+            cls.lesson_service_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(
+                    total=cls.LESSON_SERVICE_TIMEOUT,
+                    sock_connect=cls.LESSON_SERVICE_CONNECT_TIMEOUT
+                )
+            )
+        return cls.lesson_service_session
+    
+    @classmethod
+    async def close_lesson_service_session(cls):
+        """Close the shared aiohttp session if one is open"""
+        if cls.lesson_service_session is not None and not cls.lesson_service_session.closed:
+            await cls.lesson_service_session.close()
+        cls.lesson_service_session = None
+    
     async def connect(self):
         # Get session_id from URL kwargs, or generate one if not provided
         self.session_id = self.scope['url_route']['kwargs'].get('session_id')
@@ -35,6 +65,7 @@ class TeachingConsumer(AsyncWebsocketConsumer):
         )
         
         await self.accept()
+        self.active_channels.add(self.channel_name)
         logger.info(f"Teaching WebSocket connected: session {self.session_id}")
         
         # Send connection confirmation
@@ -51,6 +82,12 @@ class TeachingConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        
+        # Last teaching connection gone - don't leave the Lesson Service session open
+        self.active_channels.discard(self.channel_name)
+        if not self.active_channels:
+            await self.close_lesson_service_session()
+        
         logger.info(f"Teaching WebSocket disconnected: session {self.session_id}")
     
     async def receive(self, text_data):
@@ -331,44 +368,31 @@ class TeachingConsumer(AsyncWebsocketConsumer):
     async def call_lesson_service(self, pdf_text, filename, user_id):
         """Call Lesson Service to generate structured lesson JSON"""
         import aiohttp
-        import tempfile
-        import os
         
         try:
-            # Create temporary PDF file for Lesson Service
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp_file:
-                temp_file.write(pdf_text)
-                temp_path = temp_file.name
-            
             # Prepare form data for Lesson Service
-            lesson_service_url = "http://localhost:8003/api/generate-lesson/"
+            lesson_service_url = "http://127.0.0.1:8003/api/generate-lesson/"
             
-            async with aiohttp.ClientSession() as session:
-                # Create form data
-                data = aiohttp.FormData()
-                data.add_field('user_id', user_id)
-                data.add_field('lesson_type', 'interactive')
-                
-                # Add file
-                with open(temp_path, 'rb') as f:
-                    data.add_field('pdf_file', f, filename=filename, content_type='text/plain')
-                
-                logger.info(f"Calling Lesson Service at {lesson_service_url}")
-                
-                async with session.post(lesson_service_url, data=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info("Lesson Service responded successfully")
-                        
-                        # Clean up temp file
-                        os.unlink(temp_path)
-                        
-                        return result
-                    else:
-                        logger.error(f"Lesson Service error: {response.status}")
-                        os.unlink(temp_path)
-                        return None
-                        
+            session = self.get_lesson_service_session()
+            # Create form data
+            data = aiohttp.FormData()
+            data.add_field('user_id', user_id)
+            data.add_field('lesson_type', 'interactive')
+            
+            # Add the extracted text as the uploaded file - sent straight from memory
+            data.add_field('pdf_file', pdf_text.encode('utf-8'), filename=filename, content_type='text/plain')
+            
+            logger.info(f"Calling Lesson Service at {lesson_service_url}")
+            
+            async with session.post(lesson_service_url, data=data) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    logger.info("Lesson Service responded successfully")
+                    return result
+                else:
+                    logger.error(f"Lesson Service error: {response.status}")
+                    return None
+                    
         except Exception as e:
             logger.error(f"Error calling Lesson Service: {str(e)}")
             return None
@@ -481,7 +505,7 @@ class TeachingConsumer(AsyncWebsocketConsumer):
                     
                     # Write key points
                     y_position += 5
-                    content_lines = section_content.split('. ')[:2]  # First 2 sentences
+                    content_lines = section_content.split('. ', 2)[:2]  # First 2 sentences
                     for line in content_lines:
                         if line.strip():
                             y_position += 4
@@ -631,7 +655,7 @@ class TeachingConsumer(AsyncWebsocketConsumer):
         commands = []
         
         # Extract key points from PDF text
-        sentences = pdf_text.split('.')[:5]  # First 5 sentences
+        sentences = pdf_text.split('.', 5)[:5]  # First 5 sentences
         
         # Title
         commands.append({
@@ -1076,7 +1100,7 @@ class TeachingConsumer(AsyncWebsocketConsumer):
         important_keywords = []
         
         # Look for capitalized words (likely concepts)
-        sentences = text.split('.')
+        sentences = text.split('.', 10)
         for sentence in sentences[:10]:  # First 10 sentences
             words_in_sentence = sentence.split()
             for word in words_in_sentence:
@@ -11,18 +11,30 @@ Ensures perfect coordinate management, no overlaps, and audio-visual sync
 Port: 8006
 """
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, validator
 from typing import List, Dict, Optional, Any, Literal, TYPE_CHECKING
 from enum import Enum
+import gzip
+import hashlib
 import json
+import orjson
 import logging
 import os
+import random
 import re
+import time
+import uuid
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+from bson import Binary
 import asyncio
+import httpx
 from collections import defaultdict
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -37,7 +49,13 @@ logger = logging.getLogger(__name__)
 # ==================== Configuration ====================
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 VISUALIZATION_DB_NAME = "visualization_db"
+# Connection pool sizing - keep a few warm connections so the first request
+# after startup (or after an idle period) doesn't pay the connection handshake
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000"))
 PORT = 8006
+LESSON_SERVICE_URL = os.getenv("LESSON_SERVICE_URL", "http://127.0.0.1:8003")
 
 # Gemini AI Configuration for Visualization Generation
 # Use the SAME API key as lesson service
@@ -54,6 +72,24 @@ else:
     GEMINI_MODEL = None
     logger.warning(" Gemini API key not found - visualization generation will use fallback")
 
+# v2 generation placeholders - a caller that finds another caller's placeholder waits
+# for it; placeholders older than GENERATION_STALE_AFTER are treated as abandoned
+GENERATION_WAIT_TIMEOUT = 90  # seconds
+GENERATION_POLL_INITIAL = 0.1  # seconds - first poll, grows by GENERATION_POLL_BACKOFF
+GENERATION_POLL_MAX = 2.0  # seconds
+GENERATION_POLL_BACKOFF = 1.6
+GENERATION_POLL_JITTER = 0.2  # +/- fraction, so concurrent waiters don't poll in lockstep
+GENERATION_STALE_AFTER = 180  # seconds
+
+# Large v2 fields are stored gzip-compressed in a single "payload" field
+V2_COMPRESSED_FIELDS = ("teaching_sequence", "images")
+
+# Stored visualizations never change, so clients and proxies may cache them
+VISUALIZATION_CACHE_CONTROL = "public, max-age=3600, immutable"
+# A v2 visualization is regenerated if its store fails or its generation is taken
+# over, so clients revalidate it every time (a cheap 304 while it is unchanged)
+VISUALIZATION_V2_CACHE_CONTROL = "public, no-cache"
+
 # Canvas Configuration
 CANVAS_WIDTH = 1920
 CANVAS_HEIGHT = 1080
@@ -455,7 +491,8 @@ class VisualizationProcessor:
 app = FastAPI(
     title="Visualization Orchestrator Service",
     description="Validates and orchestrates visualization instructions for AI teaching",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse  # visualizations are large nested JSON
 )
 
 # CORS Configuration
@@ -467,13 +504,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (visualization payloads are repetitive JSON)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # MongoDB Client
 mongo_client = None
 visualization_db = None
 
+# Shared HTTP client for calls to other services (keeps connections alive) - created on startup
+http_client: Optional[httpx.AsyncClient] = None
+
 # Processor
 processor = VisualizationProcessor()
 
+async def run_cpu_bound(func, *args):
+    """
+    Run JSON parsing, validation or coordinate allocation off the event loop
+    A worker thread rather than a process: the inputs are a few KB, so pickling them
+    to another process costs more than the work itself
+    """
+    return await asyncio.to_thread(func, *args)
+
+def process_visualization_request(viz_request: VisualizationRequestModel) -> Dict[str, Any]:
+    """Process a visualization request with its own VisualizationProcessor (its coordinate state isn't thread-safe)"""
+    return VisualizationProcessor().process_visualization(viz_request)
+
+# Fire-and-forget background writes (references kept so tasks aren't garbage collected)
+background_tasks = set()
+
+def run_in_background(coro, description: str):
+    """Schedule a coroutine without awaiting it, logging failures"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    
+    def _on_done(t: asyncio.Task):
+        background_tasks.discard(t)
+        if not t.cancelled() and t.exception():
+            logger.error(f" Background task failed ({description}): {t.exception()}")
+    
+    task.add_done_callback(_on_done)
+    return task
+
 # WebSocket Connection Manager
 class ConnectionManager:
     def __init__(self):
@@ -491,19 +562,54 @@ class ConnectionManager:
     
     async def send_message(self, session_id: str, message: dict):
         if session_id in self.active_connections:
-            await self.active_connections[session_id].send_json(message)
+            await self.active_connections[session_id].send_text(orjson.dumps(message).decode())
 
 manager = ConnectionManager()
 
+# Pre-serialized pong frame - only the timestamp changes between pings
+PONG_PREFIX = b'{"type":"pong","timestamp":"'
+PONG_SUFFIX = b'"}'
+
+async def receive_frame(websocket: WebSocket):
+    """
+    Receive one WebSocket frame and decode it with orjson
+    Returns (data, binary) so replies can use the same frame type as the sender
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    
+    if message.get("bytes") is not None:
+        return orjson.loads(message["bytes"]), True
+    # Text frames are still accepted for clients that cannot send binary
+    return orjson.loads(message["text"]), False
+
+async def send_frame(websocket: WebSocket, payload: bytes, binary: bool):
+    """Send pre-serialized JSON bytes as a binary or text frame"""
+    if binary:
+        await websocket.send_bytes(payload)
+    else:
+        await websocket.send_text(payload.decode())
+
 # ==================== Startup/Shutdown ====================
 @app.on_event("startup")
 async def startup_db_client():
-    global mongo_client, visualization_db
+    global mongo_client, visualization_db, http_client
+    http_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+    )
+    
     try:
-        mongo_client = AsyncIOMotorClient(MONGODB_URL)
+        mongo_client = AsyncIOMotorClient(
+            MONGODB_URL,
+            minPoolSize=MONGODB_MIN_POOL_SIZE,
+            maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS
+        )
         visualization_db = mongo_client[VISUALIZATION_DB_NAME]
         
-        # Test connection
+        # Test connection - also makes the driver start filling the pool to minPoolSize
         await mongo_client.admin.command('ping')
         logger.info(f" Connected to MongoDB: {VISUALIZATION_DB_NAME}")
         
@@ -513,9 +619,43 @@ async def startup_db_client():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Let pending background writes finish before closing the client
+    if background_tasks:
+        await asyncio.gather(*background_tasks, return_exceptions=True)
     if mongo_client:
         mongo_client.close()
         logger.info("MongoDB connection closed")
+    if http_client:
+        await http_client.aclose()
+
+# ==================== HTTP Caching ====================
+def visualization_etag(key: str) -> str:
+    """
+    ETag for a stored visualization - derived from its key since the content is immutable
+    Weak, because GZipMiddleware serves the same representation with different bytes
+    """
+    return f'W/"{hashlib.md5(key.encode()).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the If-None-Match header against an ETag (weak comparison)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates or "*" in candidates
+
+def visualization_v2_etag(viz: Dict[str, Any]) -> str:
+    """ETag for a v2 visualization - tied to the generation that produced it, not just the lesson"""
+    return visualization_etag(f"{viz['_id']}:{viz.get('created_at', '')}")
+
+def not_modified(etag: str, cache_control: str = VISUALIZATION_CACHE_CONTROL) -> Response:
+    """Empty 304 response for a matching conditional request"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = VISUALIZATION_CACHE_CONTROL):
+    """Mark a stored visualization response as cacheable"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
 
 # ==================== API Endpoints ====================
 @app.get("/")
@@ -638,6 +778,30 @@ EXAMPLE OUTPUT FORMAT:
 Now generate teaching sequence for the given topic and lesson content. Return ONLY valid JSON.
 """
 
+def parse_teaching_sequence(response_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract and validate the teaching sequence JSON from an LLM response
+    Runs in a worker thread via run_cpu_bound
+    Returns None if no JSON object could be found
+    """
+    # Parse JSON (handle markdown code blocks)
+    json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL)
+    if not json_match:
+        json_match = re.search(r'(\{.*?\})', response_text, re.DOTALL)
+    
+    if not json_match:
+        return None
+    
+    try:
+        viz_data = json.loads(json_match.group(1))
+        
+        # Validate with Pydantic
+        validated = VisualizationDataV2(**viz_data)
+    except Exception as e:
+        raise ValueError(str(e)) from None
+    
+    return validated.dict()
+
 async def generate_visualization_v2(lesson_content: str, topic: str, images_info: List[Dict] = None) -> Dict[str, Any]:
     """
     Generate Konva.js-compatible teaching sequence with whiteboard commands
@@ -673,19 +837,11 @@ async def generate_visualization_v2(lesson_content: str, topic: str, images_info
         response_text = response.candidates[0].content.parts[0].text
         logger.info(f"� LLM Response length: {len(response_text)} chars")
         
-        # Parse JSON (handle markdown code blocks)
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-        if not json_match:
-            json_match = re.search(r'(\{.*?\})', response_text, re.DOTALL)
-        
-        if json_match:
-            viz_data = json.loads(json_match.group(1))
-            
-            # Validate with Pydantic
-            validated = VisualizationDataV2(**viz_data)
-            logger.info(f" Generated {len(validated.teaching_sequence)} teaching steps")
-            
-            return validated.dict()
+        # Parse and validate off the event loop
+        viz_data = await run_cpu_bound(parse_teaching_sequence, response_text)
+        if viz_data:
+            logger.info(f" Generated {len(viz_data['teaching_sequence'])} teaching steps")
+            return viz_data
         else:
             logger.error(" Could not extract JSON from response")
             return generate_fallback_visualization_v2(topic)
@@ -908,7 +1064,7 @@ async def process_visualization(viz_request: VisualizationRequestModel):
         
         #  STAGE 2: Process and validate visualization (coordinate management, overlap prevention)
         logger.info("� Processing and optimizing visualization...")
-        processed_data = processor.process_visualization(viz_request)
+        processed_data = await run_cpu_bound(process_visualization_request, viz_request)
         
         # Generate visualization ID
         viz_id = f"viz_{viz_request.lesson_id}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
@@ -957,9 +1113,18 @@ async def process_visualization(viz_request: VisualizationRequestModel):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/visualizations/{visualization_id}")
-async def get_visualization(visualization_id: str):
+async def get_visualization(visualization_id: str, request: Request, response: Response):
     """Retrieve processed visualization by ID"""
     try:
+        etag = visualization_etag(visualization_id)
+        if etag_matches(request, etag):
+            # The ETag is derived from the ID, so confirm the visualization still exists
+            exists = await visualization_db.visualizations.find_one(
+                {"visualization_id": visualization_id}, {"_id": 1}
+            )
+            if exists:
+                return not_modified(etag)
+        
         viz = await visualization_db.visualizations.find_one({"visualization_id": visualization_id})
         
         if not viz:
@@ -967,6 +1132,7 @@ async def get_visualization(visualization_id: str):
         
         # Convert ObjectId to string
         viz["_id"] = str(viz["_id"])
+        set_cache_headers(response, etag)
         return viz
         
     except HTTPException:
@@ -991,8 +1157,71 @@ async def get_visualizations_by_lesson(lesson_id: str):
         logger.error(f"Error retrieving visualizations for lesson: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def compress_visualization_v2(viz_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Storage form of a v2 visualization, with the large fields gzip-compressed"""
+    stored = {key: value for key, value in viz_doc.items() if key not in V2_COMPRESSED_FIELDS}
+    payload = {key: viz_doc[key] for key in V2_COMPRESSED_FIELDS if key in viz_doc}
+    stored["payload"] = Binary(gzip.compress(orjson.dumps(payload), compresslevel=6))
+    stored["content_encoding"] = "gzip"
+    return stored
+
+def inflate_visualization_v2(viz: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand a stored v2 visualization (documents stored uncompressed are returned as-is)"""
+    if viz.get("content_encoding") == "gzip":
+        viz.pop("content_encoding")
+        viz.update(orjson.loads(gzip.decompress(viz.pop("payload"))))
+    return viz
+
+async def store_visualization_v2(viz_doc: Dict[str, Any], claim_id: str):
+    """
+    Compress (off the event loop) and store a generated v2 visualization
+    If the write fails the caller's "generating" placeholder is released, so the
+    next request regenerates instead of waiting on a generation that already ended
+    """
+    try:
+        stored = await asyncio.to_thread(compress_visualization_v2, viz_doc)
+        await visualization_db.visualizations_v2.replace_one({"_id": viz_doc["_id"]}, stored, upsert=True)
+    except Exception:
+        await visualization_db.visualizations_v2.delete_one({"_id": viz_doc["_id"], "generation_id": claim_id})
+        raise
+
+async def adopt_legacy_visualization_v2(lesson_id: str, claim_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Re-key a v2 visualization stored before documents were keyed by lesson_id
+    (those have ObjectId _ids) onto the caller's placeholder, so existing lessons
+    keep their visualization instead of regenerating it
+    """
+    legacy = await visualization_db.visualizations_v2.find_one({"lesson_id": lesson_id, "_id": {"$ne": lesson_id}})
+    if not legacy:
+        return None
+    
+    viz_doc = {**legacy, "_id": lesson_id, "status": "ready"}
+    await visualization_db.visualizations_v2.replace_one({"_id": lesson_id, "generation_id": claim_id}, viz_doc)
+    await visualization_db.visualizations_v2.delete_one({"_id": legacy["_id"]})
+    logger.info(f" Migrated legacy v2 visualization {legacy['_id']} to lesson_id key")
+    return inflate_visualization_v2(viz_doc)
+
+async def wait_for_visualization_v2(lesson_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Wait for a v2 visualization another request is generating
+    Returns the finished document, or None if the placeholder vanished or the wait timed out
+    """
+    deadline = time.monotonic() + GENERATION_WAIT_TIMEOUT
+    delay = GENERATION_POLL_INITIAL
+    while time.monotonic() < deadline:
+        # Poll quickly at first, then back off so a long generation isn't polled every half second
+        jittered = delay * random.uniform(1 - GENERATION_POLL_JITTER, 1 + GENERATION_POLL_JITTER)
+        await asyncio.sleep(min(jittered, max(deadline - time.monotonic(), 0)))
+        delay = min(delay * GENERATION_POLL_BACKOFF, GENERATION_POLL_MAX)
+        viz = await visualization_db.visualizations_v2.find_one({"_id": lesson_id})
+        if viz is None:
+            return None  # Generation failed and the placeholder was removed
+        if viz.get("status") != "generating":
+            return inflate_visualization_v2(viz)
+    return None
+
 @app.get("/visualization/v2/{lesson_id}")
-async def get_visualization_v2(lesson_id: str):
+async def get_visualization_v2(lesson_id: str, request: Request, response: Response):
     """
     Get visualization in new Konva.js whiteboard format
     Returns teaching_sequence with whiteboard commands
@@ -1000,53 +1229,107 @@ async def get_visualization_v2(lesson_id: str):
     try:
         logger.info(f"Fetching v2 visualization for lesson: {lesson_id}")
         
-        # Try to get existing visualization from database
-        viz = await visualization_db.visualizations_v2.find_one({"lesson_id": lesson_id})
+        # A client that already has this generation of the visualization can reuse it -
+        # only the fields the ETag needs are loaded to answer that
+        if request.headers.get("if-none-match"):
+            stored = await visualization_db.visualizations_v2.find_one(
+                {"_id": lesson_id}, {"status": 1, "created_at": 1}
+            )
+            if stored and stored.get("status") != "generating":
+                etag = visualization_v2_etag(stored)
+                if etag_matches(request, etag):
+                    return not_modified(etag, VISUALIZATION_V2_CACHE_CONTROL)
         
-        if viz:
-            viz["_id"] = str(viz["_id"])
+        # Fetch the visualization, atomically inserting a "generating" placeholder
+        # if there is none - only the request whose placeholder was inserted generates
+        claim_id = uuid.uuid4().hex
+        viz = await visualization_db.visualizations_v2.find_one_and_update(
+            {"_id": lesson_id},
+            {"$setOnInsert": {
+                "lesson_id": lesson_id,
+                "status": "generating",
+                "generation_id": claim_id,
+                "claimed_at": time.time()
+            }},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if viz.get("status") != "generating":
             logger.info(f" Found existing v2 visualization")
-            return viz
+            set_cache_headers(response, visualization_v2_etag(viz), VISUALIZATION_V2_CACHE_CONTROL)
+            return inflate_visualization_v2(viz)
         
-        # If not found, generate new one
-        logger.info(f"No existing v2 visualization, generating new one...")
+        if viz.get("generation_id") != claim_id:
+            # Someone else is generating - take over only if their placeholder is abandoned
+            claimed = None
+            if time.time() - viz.get("claimed_at", 0) > GENERATION_STALE_AFTER:
+                claimed = await visualization_db.visualizations_v2.find_one_and_update(
+                    {"_id": lesson_id, "generation_id": viz.get("generation_id")},
+                    {"$set": {"generation_id": claim_id, "claimed_at": time.time()}}
+                )
+            
+            if not claimed:
+                logger.info(f"v2 visualization is being generated by another request, waiting...")
+                viz = await wait_for_visualization_v2(lesson_id)
+                if viz is None:
+                    raise HTTPException(status_code=503, detail="Visualization generation in progress, please retry")
+                set_cache_headers(response, visualization_v2_etag(viz), VISUALIZATION_V2_CACHE_CONTROL)
+                return viz
         
-        # Get lesson data from lesson service
         try:
-            lesson_response = await asyncio.to_thread(
-                lambda: __import__('requests').get(f"http://localhost:8003/api/lessons/{lesson_id}")
-            )
-            if lesson_response.status_code != 200:
-                raise HTTPException(status_code=404, detail="Lesson not found")
+            # This request owns the placeholder - reuse a visualization stored under the old key first
+            viz = await adopt_legacy_visualization_v2(lesson_id, claim_id)
+            if viz is not None:
+                set_cache_headers(response, visualization_v2_etag(viz), VISUALIZATION_V2_CACHE_CONTROL)
+                return viz
             
-            response_data = lesson_response.json()
-            # Response structure: { success: true, lesson: {...} }
-            lesson_data = response_data.get('lesson', response_data)
+            logger.info(f"No existing v2 visualization, generating new one...")
             
-            # Get lesson content and metadata
-            lesson_content = lesson_data.get('lesson_content', lesson_data.get('content', ''))
-            topic = lesson_data.get('lesson_title', lesson_data.get('title', 'Educational Topic'))
-            images = lesson_data.get('pdf_images', [])
+            # Get lesson data from lesson service
+            try:
+                lesson_response = await http_client.get(f"{LESSON_SERVICE_URL}/api/lessons/{lesson_id}")
+                if lesson_response.status_code != 200:
+                    raise HTTPException(status_code=404, detail="Lesson not found")
+                
+                response_data = orjson.loads(lesson_response.content)
+                # Response structure: { success: true, lesson: {...} }
+                lesson_data = response_data.get('lesson', response_data)
+                
+                # Get lesson content and metadata
+                lesson_content = lesson_data.get('lesson_content', lesson_data.get('content', ''))
+                topic = lesson_data.get('lesson_title', lesson_data.get('title', 'Educational Topic'))
+                images = lesson_data.get('pdf_images', [])
+                
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to fetch lesson data: {e}")
+                raise HTTPException(status_code=500, detail="Failed to fetch lesson data")
             
-        except Exception as e:
-            logger.error(f"Failed to fetch lesson data: {e}")
-            raise HTTPException(status_code=500, detail="Failed to fetch lesson data")
-        
-        # Generate visualization v2
-        viz_data = await generate_visualization_v2(lesson_content, topic, images)
-        
-        # Store in database
-        viz_doc = {
-            "lesson_id": lesson_id,
-            "teaching_sequence": viz_data['teaching_sequence'],
-            "images": viz_data.get('images', []),
-            "created_at": datetime.utcnow().isoformat()
-        }
+            # Generate visualization v2
+            viz_data = await generate_visualization_v2(lesson_content, topic, images)
+            
+            # Replace the placeholder - _id is the lesson_id, so one document per lesson
+            viz_doc = {
+                "_id": lesson_id,
+                "lesson_id": lesson_id,
+                "status": "ready",
+                "teaching_sequence": viz_data['teaching_sequence'],
+                "images": viz_data.get('images', []),
+                "created_at": datetime.utcnow().isoformat()
+            }
+        except Exception:
+            # Release the placeholder so the next request can retry
+            await visualization_db.visualizations_v2.delete_one({"_id": lesson_id, "generation_id": claim_id})
+            raise
         
-        result = await visualization_db.visualizations_v2.insert_one(viz_doc)
-        viz_doc["_id"] = str(result.inserted_id)
+        # The client doesn't need to wait for the write - if it fails the placeholder
+        # is released by the store and the visualization is regenerated on the next request
+        run_in_background(store_visualization_v2(viz_doc, claim_id), f"store v2 visualization {lesson_id}")
         
-        logger.info(f" Generated and stored v2 visualization")
+        logger.info(f" Generated v2 visualization, storing in background")
+        set_cache_headers(response, visualization_v2_etag(viz_doc), VISUALIZATION_V2_CACHE_CONTROL)
         return viz_doc
         
     except HTTPException:
@@ -1055,22 +1338,52 @@ async def get_visualization_v2(lesson_id: str):
         logger.error(f"Error in get_visualization_v2: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def watch_lesson_visualizations(websocket: WebSocket, lesson_id: str):
+    """
+    Push a lesson's v2 visualization over the WebSocket as soon as it is stored,
+    using a MongoDB change stream on visualizations_v2 ("generating" placeholders
+    are skipped). v1 visualizations are already announced by create_visualization's
+    visualization_ready message. Change streams need a replica set - on a standalone
+    server this logs a warning and clients keep using /visualization/v2/{lesson_id}
+    """
+    pipeline = [{"$match": {
+        "operationType": {"$in": ["insert", "update", "replace"]},
+        "fullDocument.lesson_id": lesson_id,
+        "fullDocument.status": "ready"
+    }}]
+    try:
+        async with visualization_db.visualizations_v2.watch(pipeline, full_document="updateLookup") as stream:
+            async for change in stream:
+                viz = change.get("fullDocument")
+                if not viz:
+                    continue
+                viz = await run_cpu_bound(inflate_visualization_v2, viz)
+                await websocket.send_text(orjson.dumps({"type": "visualization_v2_data", "data": viz}).decode())
+    except OperationFailure as e:
+        logger.warning(f"Change streams unavailable, not pushing updates for lesson {lesson_id}: {e}")
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Visualization change stream error for lesson {lesson_id}: {e}")
+
 @app.websocket("/ws/visualization/{session_id}")
-async def visualization_websocket(websocket: WebSocket, session_id: str):
+async def visualization_websocket(websocket: WebSocket, session_id: str, lesson_id: Optional[str] = None):
     """
     WebSocket endpoint for real-time visualization streaming
     Used by Teaching Service to receive visualization updates
+    Pass ?lesson_id=... to have that lesson's v2 visualization pushed once it is stored
     """
     await manager.connect(session_id, websocket)
+    watch_task = asyncio.create_task(watch_lesson_visualizations(websocket, lesson_id)) if lesson_id else None
     
     try:
         while True:
             # Receive messages from Teaching Service
-            data = await websocket.receive_json()
+            data, binary = await receive_frame(websocket)
             message_type = data.get("type")
             
             if message_type == "ping":
-                await websocket.send_json({"type": "pong", "timestamp": datetime.utcnow().isoformat()})
+                await send_frame(websocket, PONG_PREFIX + datetime.utcnow().isoformat().encode() + PONG_SUFFIX, binary)
             
             elif message_type == "request_visualization":
                 lesson_id = data.get("lesson_id")
@@ -1078,17 +1391,44 @@ async def visualization_websocket(websocket: WebSocket, session_id: str):
                 viz = await visualization_db.visualizations.find_one({"lesson_id": lesson_id})
                 if viz:
                     viz["_id"] = str(viz["_id"])
-                    await websocket.send_json({"type": "visualization_data", "data": viz})
+                    await send_frame(websocket, orjson.dumps({"type": "visualization_data", "data": viz}), binary)
                 else:
-                    await websocket.send_json({"type": "error", "message": "Visualization not found"})
+                    await send_frame(websocket, orjson.dumps({"type": "error", "message": "Visualization not found"}), binary)
             
     except WebSocketDisconnect:
         manager.disconnect(session_id)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         manager.disconnect(session_id)
+    finally:
+        if watch_task:
+            watch_task.cancel()
 
 # ==================== Main ====================
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
+    
+    # uvloop and httptools ship with uvicorn[standard]; uvloop isn't available on Windows
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http_impl = "httptools"
+    except ImportError:
+        http_impl = "h11"
+    
+    # WebSocket sessions are tracked per process, so extra workers only help when
+    # clients don't depend on visualization_ready notifications reaching their session
+    workers = int(os.getenv("UVICORN_WORKERS", "1"))
+    
+    uvicorn.run(
+        "app:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=PORT,
+        loop=loop_impl,
+        http=http_impl,
+        workers=workers
+    )